@@ -62,7 +62,7 @@ class OptimizerFixture:
         self.param_groups = []
         self.param_groups.append({"lr": 0})
 
-    def zero_grad(self):
+    def zero_grad(self, set_to_none=True):
         """Dummy function for zero_grad."""
         pass
 
@@ -96,4 +96,4 @@ class LossFixture:
 
     def detach(self):
         """Dummy function for detach."""
-        return self
+        return torch.zeros(())
@@ -1,4 +1,6 @@
+import dask.array as da
 import numpy as np
+import pytest
 
 from napari_cellseg3d.code_plugins.plugin_convert import StatsUtils
 from napari_cellseg3d.code_plugins.plugin_crop import Cropping
@@ -56,10 +58,36 @@ def test_crop_widget(make_napari_viewer_proxy):
     widget.sliders[0].setValue(2)
     widget.sliders[1].setValue(2)
     widget.sliders[2].setValue(2)
+    widget._apply_pending_slices()  # slider moves are applied on a timer
 
     widget._start()
 
 
+@pytest.mark.parametrize("lazy", [False, True])
+def test_crop_widget_sliders(make_napari_viewer_proxy, lazy):
+    view = make_napari_viewer_proxy()
+    widget = Cropping(view)
+
+    image = rand_gen.random((10, 10, 10)).astype(np.int8)
+    data = da.from_array(image, chunks=5) if lazy else image
+    view.add_image(data, name="image")
+    view.add_labels(data, name="image2")
+    view.window.add_dock_widget(widget)
+    widget.crop_second_image_choice.setChecked(True)
+    for box in widget.crop_size_widgets:
+        box.setValue(4)
+
+    widget._start()
+    for i, slider in enumerate(widget.sliders):
+        slider.setValue(i + 1)
+    widget._apply_pending_slices()
+
+    expected = image[1:5, 2:6, 3:7]
+    for layer in [widget.im1_crop_layer, widget.im2_crop_layer]:
+        assert list(layer.translate) == [1, 2, 3]
+        assert np.array_equal(np.asarray(layer.data), expected)
+
+
 def test_stats_plugin(make_napari_viewer_proxy):
     view = make_napari_viewer_proxy()
     widget = StatsUtils(view)
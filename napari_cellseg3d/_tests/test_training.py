@@ -1,6 +1,8 @@
 from pathlib import Path
 
 import pytest
+import torch
+from monai.data import CacheDataset, PatchDataset
 
 from napari_cellseg3d._tests.fixtures import (
     LogFixture,
@@ -11,6 +13,9 @@ from napari_cellseg3d._tests.fixtures import (
     WNetFixture,
 )
 from napari_cellseg3d.code_models.models.model_test import TestModel
+from napari_cellseg3d.code_models.worker_training import (
+    SupervisedTrainingWorker,
+)
 from napari_cellseg3d.code_models.workers_utils import TrainingReport
 from napari_cellseg3d.code_plugins.plugin_model_training import (
     Trainer,
@@ -137,3 +142,23 @@ def test_unsupervised_training(make_napari_viewer_proxy):
     assert isinstance(eval_res, TrainingReport)
     assert eval_res.show_plot
     assert eval_res.epoch == -10
+
+
+def test_sampling_keeps_cached_volumes():
+    sample_size = [6, 6, 6]
+    cache = CacheDataset(
+        data=[{"image": im_path_str, "label": lab_path_str}],
+        transform=SupervisedTrainingWorker._get_volume_loader(),
+    )
+    assert cache[0]["image"].dtype == torch.float16
+    cached_image = cache[0]["image"].clone()
+    dataset = PatchDataset(
+        data=cache,
+        patch_func=SupervisedTrainingWorker._get_patch_loader(sample_size, 2),
+        samples_per_image=2,
+    )
+    for patches in dataset:
+        assert patches["image"].dtype == torch.float32
+        # patches are padded to the model input size
+        assert tuple(patches["image"].shape[1:]) == (8, 8, 8)
+    assert torch.equal(cache[0]["image"], cached_image)
@@ -5,6 +5,7 @@ from pathlib import Path
 import numpy as np
 import pytest
 import torch
+from tifffile import imwrite
 
 from napari_cellseg3d import utils
 from napari_cellseg3d.dev_scripts import thread_test
@@ -37,6 +38,29 @@ def test_save_folder():
         assert (test_path / folder_name / images_paths[i]).is_file()
 
 
+def test_save_stack(tmp_path):
+    labels = rand_gen.integers(0, 5, (3, 6, 6)).astype(np.uint16)
+    utils.save_stack(labels, tmp_path / "labels", filetype=".tif")
+
+    assert len(list((tmp_path / "labels").glob("*.tif"))) == 3
+    loaded = utils.load_images(
+        str(tmp_path / "labels"), filetype=".tif", as_folder=True, lazy=False
+    )
+    assert np.array_equal(loaded, labels)
+
+
+def test_load_images_single_file_eager(tmp_path):
+    labels = rand_gen.integers(0, 5, (3, 6, 6)).astype(np.uint16)
+    path = tmp_path / "labels.tif"
+    imwrite(str(path), labels)
+
+    assert isinstance(utils.load_images(str(path)), np.memmap)
+    loaded = utils.load_images(str(path), lazy=False)
+    # eager loads must not keep the file mapped, it may be overwritten
+    assert not isinstance(loaded, np.memmap)
+    assert np.array_equal(loaded, labels)
+
+
 def test_normalize_y():
     test_array = np.array([0, 255, 127.5])
     results = utils.normalize_y(test_array)
@@ -192,22 +216,45 @@ def test_normalize_x():
     assert np.all(test_array == expected)
 
 
-def test_load_images():
+def test_load_images(tmp_path):
     path = Path(__file__).resolve().parent / "res"
-    # with pytest.raises(
-    #     ValueError, match="If loading as a folder, filetype must be specified"
-    # ):
-    #     images = utils.load_images(str(path), as_folder=True)
-    # with pytest.raises(
-    #     NotImplementedError,
-    #     match="Loading as folder not implemented yet. Use napari to load as folder",
-    # ):
-    #     images = utils.load_images(str(path), as_folder=True, filetype=".tif")
-    # # assert len(images) == 1
+    with pytest.raises(
+        ValueError, match="If loading as a folder, filetype must be specified"
+    ):
+        utils.load_images(str(path), as_folder=True)
     path = path / "test.tif"
     images = utils.load_images(str(path))
     assert images.shape == (6, 6, 6)
 
+    slices = [rand_gen.random((5, 7)).astype(np.float32) for _ in range(4)]
+    utils.save_folder(
+        tmp_path, "stack", slices, [f"{i}.tif" for i in range(4)]
+    )
+    stack = utils.load_images(
+        str(tmp_path / "stack"), filetype=".tif", as_folder=True
+    )
+    assert stack.shape == (4, 5, 7)
+    assert stack.numblocks == (4, 1, 1)
+    assert np.allclose(stack.compute(), np.stack(slices))
+
+    stack = utils.load_images(
+        str(tmp_path / "stack"), filetype=".tif", as_folder=True, lazy=False
+    )
+    assert isinstance(stack, np.ndarray)
+    assert np.allclose(stack, np.stack(slices))
+
+
+def test_load_images_multiscale_zarr(tmp_path):
+    zarr = pytest.importorskip("zarr")
+    path = tmp_path / "pyramid.zarr"
+    group = zarr.open_group(str(path), mode="w")
+    group["0"] = np.ones((8, 8, 8), dtype=np.uint16)
+    group["1"] = np.ones((4, 4, 4), dtype=np.uint16)
+
+    levels = utils.load_images(str(path))
+    assert isinstance(levels, list)
+    assert [level.shape for level in levels] == [(8, 8, 8), (4, 4, 4)]
+
 
 def test_parse_default_path():
     user_path = Path.home()
@@ -1,5 +1,5 @@
 """SegResNet wrapper for napari_cellseg3d."""
-from monai.networks.nets import SegResNetVAE
+from monai.networks.nets import SegResNet, SegResNetVAE
 
 
 class SegResNet_(SegResNetVAE):
@@ -25,10 +25,11 @@ class SegResNet_(SegResNetVAE):
         )
 
     def forward(self, x):
-        """Forward pass of the SegResNet model."""
-        res = SegResNetVAE.forward(self, x)
-        # logger.debug(f"SegResNetVAE.forward: {res[0].shape}")
-        return res[0]
+        """Forward pass of the SegResNet model.
+
+        Only the segmentation branch is run : the VAE loss computed by SegResNetVAE in training mode is never used.
+        """
+        return SegResNet.forward(self, x)
 
     # def get_model_test(self, size):
     #     return SegResNetVAE(
@@ -340,6 +340,10 @@ class InferenceWorker(GeneratorWorker):
         dataset_device = (
             "cpu" if self.config.keep_on_cpu else self.config.device
         )
+        if torch.device(dataset_device).type == "cuda":
+            # single copy of the volume, windows are then sliced on the GPU
+            # instead of copied one by one
+            inputs = inputs.to(dataset_device)
 
         if self.config.sliding_window_config.is_enabled():
             window_size = self.config.sliding_window_config.window_size
@@ -1,7 +1,11 @@
 """Contains the workers used to train the models."""
+import importlib.util
+import os
 import platform
 import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from math import ceil
 from pathlib import Path
 
@@ -14,7 +18,7 @@ from monai.data import (
     CacheDataset,
     DataLoader,
     PatchDataset,
-    decollate_batch,
+    ThreadDataLoader,
     pad_list_data_collate,
 )
 from monai.data.meta_obj import set_track_meta
@@ -28,9 +32,9 @@ from monai.losses import (
 from monai.metrics import DiceMetric
 from monai.transforms import (
     AsDiscrete,
+    CastToTyped,
     Compose,
     EnsureChannelFirstd,
-    EnsureType,
     EnsureTyped,
     LoadImaged,
     Orientationd,
@@ -41,6 +45,7 @@ from monai.transforms import (
     RandShiftIntensityd,
     RandSpatialCropSamplesd,
     SpatialPadd,
+    ThresholdIntensityd,
 )
 from monai.utils import set_determinism
 
@@ -53,9 +58,9 @@ from napari_cellseg3d.code_models.models.wnet.model import WNet
 from napari_cellseg3d.code_models.models.wnet.soft_Ncuts import SoftNCutsLoss
 from napari_cellseg3d.code_models.workers_utils import (
     PRETRAINED_WEIGHTS_DIR,
+    CUDAPrefetcher,
     LogSignal,
     QuantileNormalizationd,
-    RemapTensor,
     Threshold,
     TrainingReport,
     WeightsDownloader,
@@ -112,6 +117,8 @@ class TrainingWorkerBase(GeneratorWorker):
         self.config = None
 
         self._weight_error = False
+        self._save_executor = None
+        self._save_futures = []
         ################################
 
     def set_download_log(self, widget):
@@ -142,6 +149,57 @@ class TrainingWorkerBase(GeneratorWorker):
         self.errored.emit(exception)
         self.quit()
 
+    def _save_weights_async(self, model, path):
+        """Saves a CPU copy of the model weights to ``path`` in a background thread, so that training can resume immediately."""
+        state_dict = {
+            key: value.detach().to("cpu", copy=True)
+            for key, value in model.state_dict().items()
+        }
+        # errors of the saves already done are raised as soon as possible
+        pending = []
+        for future in self._save_futures:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        self._save_futures = pending
+        if self._save_executor is None:
+            # a single thread writes the weights in order, so that two
+            # saves to the same path never overlap
+            self._save_executor = ThreadPoolExecutor(max_workers=1)
+        self._save_futures.append(
+            self._save_executor.submit(torch.save, state_dict, path)
+        )
+
+    def _wait_for_saves(self):
+        """Waits for the weights being saved in the background to be written, and raises any error that occurred while saving."""
+        futures, self._save_futures = self._save_futures, []
+        for future in futures:
+            future.result()
+
+    def _close_saves(self):
+        """Waits for the weights being saved in the background and stops the saving thread, reporting any error that occurred while saving."""
+        try:
+            self._wait_for_saves()
+        except Exception as e:
+            self.raise_error(e, "Error when saving weights")
+        finally:
+            if self._save_executor is not None:
+                self._save_executor.shutdown(wait=True)
+                self._save_executor = None
+
+    def _get_num_workers(self, num_volumes):
+        """Returns the number of DataLoader workers set in the config, or one chosen from the CPU count and batch size if it is None.
+
+        Volumes are split between workers, so the chosen number is at most ``num_volumes``.
+        """
+        if self.config.num_workers is not None:
+            return self.config.num_workers
+        cpu_count = os.cpu_count() or 1
+        return max(
+            1, min(cpu_count, max(2, 4 * self.config.batch_size), num_volumes)
+        )
+
     @abstractmethod
     def log_parameters(self):
         """Logs the parameters of the training."""
@@ -336,14 +394,18 @@ class WNetTrainingWorker(TrainingWorkerBase):
                 dataset,
                 batch_size=self.config.batch_size,
                 shuffle=True,
-                num_workers=self.config.num_workers,
+                num_workers=self._get_num_workers(
+                    len(self.config.train_data_dict)
+                ),
                 collate_fn=pad_list_data_collate,
             )
         except ValueError:
             self.dataloader = DataLoader(
                 dataset,
                 batch_size=self.config.batch_size,
-                num_workers=self.config.num_workers,
+                num_workers=self._get_num_workers(
+                    len(self.config.train_data_dict)
+                ),
                 collate_fn=pad_list_data_collate,
             )
 
@@ -355,14 +417,18 @@ class WNetTrainingWorker(TrainingWorkerBase):
                     eval_dataset,
                     batch_size=self.config.eval_batch_size,
                     shuffle=False,
-                    num_workers=self.config.num_workers,
+                    num_workers=self._get_num_workers(
+                        len(self.config.eval_volume_dict)
+                    ),
                     collate_fn=pad_list_data_collate,
                 )
             except ValueError:
                 self.eval_dataloader = DataLoader(
                     eval_dataset,
                     batch_size=self.config.eval_batch_size,
-                    num_workers=self.config.num_workers,
+                    num_workers=self._get_num_workers(
+                        len(self.config.eval_volume_dict)
+                    ),
                     collate_fn=pad_list_data_collate,
                 )
         else:
@@ -615,7 +681,7 @@ class WNetTrainingWorker(TrainingWorkerBase):
                         )
 
                     # Backward pass for the reconstruction loss
-                    optimizer.zero_grad()
+                    optimizer.zero_grad(set_to_none=True)
                     alpha = self.config.n_cuts_weight
                     beta = self.config.rec_loss_weight
 
@@ -764,8 +830,8 @@ class WNetTrainingWorker(TrainingWorkerBase):
 
                 # Save the model
                 if epoch % 5 == 0:
-                    torch.save(
-                        model.state_dict(),
+                    self._save_weights_async(
+                        model,
                         self.config.results_path_folder
                         + "/wnet_checkpoint.pth",
                     )
@@ -790,6 +856,7 @@ class WNetTrainingWorker(TrainingWorkerBase):
                 f"Saving the model to: {self.config.results_path_folder}/wnet.pth",
             )
             save_weights_path = self.config.results_path_folder + "/wnet.pth"
+            self._wait_for_saves()
             torch.save(
                 model.state_dict(),
                 save_weights_path,
@@ -828,6 +895,8 @@ class WNetTrainingWorker(TrainingWorkerBase):
             self.raise_error(e, msg)
             self.quit()
             raise e
+        finally:
+            self._close_saves()
 
     def eval(self, model, epoch) -> TrainingReport:
         """Evaluates the model on the validation set.
@@ -909,7 +978,7 @@ class WNetTrainingWorker(TrainingWorkerBase):
                     + "_best_metric.pth"
                 )
                 self.log(f"Saving new best model to {save_path}")
-                torch.save(model.state_dict(), save_path)
+                self._save_weights_async(model, save_path)
 
             if WANDB_INSTALLED:
                 # log validation dice score for each validation round
@@ -968,6 +1037,8 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
     """
 
     labels_not_semantic = False
+    _model_cache = {}
+    """Model built by the last run, kept on its device for the next one. Keyed by name, input size and device"""
 
     def __init__(
         self,
@@ -1012,25 +1083,156 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
         super().__init__()  # worker function is self.train in parent class
         self.config = worker_config
         #######################################
+        # only the selected loss is instantiated, in _set_loss_from_config
         self.loss_dict = {
-            "Dice": DiceLoss(sigmoid=True),
-            # "BCELoss": torch.nn.BCELoss(), # dev
-            # "BCELogits": torch.nn.BCEWithLogitsLoss(),
-            "Generalized Dice": GeneralizedDiceLoss(sigmoid=True),
-            "DiceCE": DiceCELoss(sigmoid=True, lambda_ce=0.5),
-            "Tversky": TverskyLoss(sigmoid=True),
-            # "Focal loss": FocalLoss(),
-            # "Dice-Focal loss": DiceFocalLoss(sigmoid=True, lambda_dice=0.5),
+            "Dice": partial(DiceLoss, sigmoid=True),
+            # "BCELoss": torch.nn.BCELoss, # dev
+            # "BCELogits": torch.nn.BCEWithLogitsLoss,
+            "Generalized Dice": partial(GeneralizedDiceLoss, sigmoid=True),
+            "DiceCE": partial(DiceCELoss, sigmoid=True, lambda_ce=0.5),
+            "Tversky": partial(TverskyLoss, sigmoid=True),
+            # "Focal loss": FocalLoss,
+            # "Dice-Focal loss": partial(DiceFocalLoss, sigmoid=True, lambda_dice=0.5),
         }
         self.loss_function = None
 
     def _set_loss_from_config(self):
         try:
-            self.loss_function = self.loss_dict[self.config.loss_function]
+            self.loss_function = self.loss_dict[self.config.loss_function]()
         except KeyError as e:
             self.raise_error(e, "Loss function not found, aborting job")
         return self.loss_function
 
+    def _compile_model(self, model, device):
+        """Returns a compiled version of the model for the training forward pass, or the model itself if compilation is not available.
+
+        Compilation requires PyTorch 2, Triton and a CUDA device of compute capability 7.0 or higher.
+        Input shapes are fixed by padding, so a single graph is captured.
+        Compilation happens on the first forward pass, errors are handled there by :py:func:`~_use_eager_model`.
+        """
+        if (
+            device.type != "cuda"
+            or not hasattr(torch, "compile")
+            or importlib.util.find_spec("triton") is None
+            or torch.cuda.get_device_capability(device) < (7, 0)
+        ):
+            return model
+        self.log("Model will be compiled, first step will be slower")
+        return torch.compile(model, mode="reduce-overhead", dynamic=False)
+
+    def _use_eager_model(self, model, error):
+        """Returns the model to use instead of its compiled version when compilation failed, and stops reusing the compiled one."""
+        logger.warning(f"Could not compile model : {error}", exc_info=True)
+        self.log(f"Could not compile model, using eager mode : {error}")
+        cache = SupervisedTrainingWorker._model_cache
+        for key, (cached_model, _, use_channels_last) in cache.items():
+            if cached_model is model:
+                cache[key] = (model, model, use_channels_last)
+        return model
+
+    def _get_model(self, model_class, model_name, input_size, device):
+        """Returns the model, its training version and whether it uses channels last, reusing those of the previous run if possible.
+
+        A reused model gets the weights of a newly built one, initialized as in a new run,
+        which skips moving it to the device and compiling it again.
+        """
+        key = (model_name, tuple(input_size), str(device))
+        new_model = model_class(input_img_size=input_size, use_checkpoint=True)
+        cached = SupervisedTrainingWorker._model_cache.get(key)
+        if cached is not None:
+            model, train_model, use_channels_last = cached
+            model.load_state_dict(new_model.state_dict())
+            self.log("Reusing model from previous run")
+            return model, train_model, use_channels_last
+
+        # only the last model is kept, to free the memory of the others
+        SupervisedTrainingWorker.clear_model_cache()
+        cached = self._prepare_model(new_model, device)
+        SupervisedTrainingWorker._model_cache[key] = cached
+        return cached
+
+    @classmethod
+    def clear_model_cache(cls):
+        """Releases the model kept from the last run, e.g. to free GPU memory for inference."""
+        if len(cls._model_cache) == 0:
+            return
+        cls._model_cache.clear()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def _prepare_model(self, model, device):
+        """Moves the model to the device and returns it, its training version and whether it uses channels last."""
+        model = model.to(device)
+        use_channels_last = False
+        if device.type == "cuda":
+            # NDHWC layout enables the faster cuDNN 3D conv kernels
+            try:
+                model = model.to(memory_format=torch.channels_last_3d)
+                use_channels_last = True
+            except RuntimeError as e:
+                logger.warning(f"Could not use channels last format : {e}")
+        # validation uses sliding windows of varying shapes, so only the
+        # training forward pass is compiled; weights are shared
+        train_model = self._compile_model(model, device)
+        return model, train_model, use_channels_last
+
+    @staticmethod
+    def _get_volume_loader():
+        """Returns the transforms that load the volumes to cache in memory for sampling."""
+        # volumes are loaded once and kept in memory, only patch
+        # extraction and augmentation run each epoch
+        fp16_max = float(np.finfo(np.float16).max)
+        return Compose(
+            [
+                LoadImaged(keys=["image", "label"], dtype=None),
+                EnsureChannelFirstd(keys=["image", "label"]),
+                Orientationd(keys=["image", "label"], axcodes="PLI"),
+                # images are cached as float16 to halve their size, values
+                # out of range (e.g. saturated uint16) are clamped, not inf
+                ThresholdIntensityd(
+                    keys=["image"],
+                    threshold=fp16_max,
+                    above=False,
+                    cval=fp16_max,
+                ),
+                ThresholdIntensityd(
+                    keys=["image"],
+                    threshold=-fp16_max,
+                    above=True,
+                    cval=-fp16_max,
+                ),
+                CastToTyped(keys=["image"], dtype=np.float16),
+            ]
+        )
+
+    @staticmethod
+    def _get_patch_loader(sample_size, num_samples):
+        """Returns the transforms that extract patches of ``sample_size`` from the cached volumes, padded to the model input size.
+
+        The cached volumes are not copied by the dataset, so these transforms must not modify them in place.
+        """
+        return Compose(
+            [
+                RandSpatialCropSamplesd(
+                    keys=["image", "label"],
+                    roi_size=(
+                        sample_size
+                    ),  # multiply by axis_stretch_factor if anisotropy
+                    # max_roi_size=(120, 120, 120),
+                    random_size=False,
+                    num_samples=num_samples,
+                ),
+                SpatialPadd(
+                    keys=["image", "label"],
+                    spatial_size=(utils.get_padding_dim(sample_size)),
+                ),
+                # cached float16 images are cast back for training
+                CastToTyped(keys=["image", "label"], dtype=np.float32),
+                QuantileNormalizationd(keys=["image"]),
+                EnsureTyped(keys=["image"]),
+            ]
+        )
+
     def log_parameters(self):
         """Logs the parameters of the training."""
         self.log("-" * 20)
@@ -1149,6 +1351,12 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
 
         start_time = time.time()
+        # global backend flags changed for training, restored at the end
+        backend_flags = (
+            torch.backends.cudnn.benchmark,
+            torch.backends.cudnn.allow_tf32,
+            torch.backends.cuda.matmul.allow_tf32,
+        )
 
         try:
             if WANDB_INSTALLED:
@@ -1209,14 +1417,23 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             size = self.config.sample_size if do_sampling else check
             PADDING = utils.get_padding_dim(size)
 
-            model = (
-                model_class(input_img_size=PADDING, use_checkpoint=True)
-                if provided_model is None
-                else provided_model
-            )
-
             device = torch.device(self.config.device)
-            model = model.to(device)
+            if device.type == "cuda":
+                # input shapes are fixed by padding, so the conv algorithms
+                # benchmarked on the first step are reused afterwards
+                torch.backends.cudnn.benchmark = (
+                    not deterministic_config.enabled
+                )
+                torch.backends.cudnn.allow_tf32 = True
+                torch.backends.cuda.matmul.allow_tf32 = True
+            if provided_model is None:
+                model, train_model, use_channels_last = self._get_model(
+                    model_class, model_name, PADDING, device
+                )
+            else:
+                model, train_model, use_channels_last = self._prepare_model(
+                    provided_model, device
+                )
 
             if WANDB_INSTALLED:
                 wandb.watch(model, log_freq=100)
@@ -1263,21 +1480,31 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             if len(self.val_files) == 0:
                 raise ValueError("Validation dataset is empty")
 
+            gpu_augmentation = None
             if self.config.do_augmentation:
+                elastic = Rand3DElasticd(
+                    keys=["image", "label"],
+                    sigma_range=(0.3, 0.7),
+                    magnitude_range=(0.3, 0.7),
+                    device=device,
+                )
+                affine = RandAffined(
+                    keys=["image"],
+                    device=device,
+                )
+                # grid-sampling augmentations are applied to the batches on
+                # the GPU instead of in the DataLoader workers
+                on_gpu = device.type == "cuda"
+                if on_gpu:
+                    gpu_augmentation = Compose([elastic, affine])
                 train_transforms = (
                     Compose(  # TODO : figure out which ones and values ?
                         [
                             RandShiftIntensityd(keys=["image"], offsets=0.7),
-                            Rand3DElasticd(
-                                keys=["image", "label"],
-                                sigma_range=(0.3, 0.7),
-                                magnitude_range=(0.3, 0.7),
-                            ),
+                            *([] if on_gpu else [elastic]),
                             RandFlipd(keys=["image", "label"]),
                             RandRotate90d(keys=["image", "label"]),
-                            RandAffined(
-                                keys=["image"],
-                            ),
+                            *([] if on_gpu else [affine]),
                             EnsureTyped(keys=["image"]),
                         ]
                     )
@@ -1291,33 +1518,6 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                 ]
             )
 
-            def get_patch_loader_func(num_samples):
-                """Returns a function that will be used to extract patches from the images."""
-                return Compose(
-                    [
-                        LoadImaged(keys=["image", "label"]),
-                        EnsureChannelFirstd(keys=["image", "label"]),
-                        RandSpatialCropSamplesd(
-                            keys=["image", "label"],
-                            roi_size=(
-                                self.config.sample_size
-                            ),  # multiply by axis_stretch_factor if anisotropy
-                            # max_roi_size=(120, 120, 120),
-                            random_size=False,
-                            num_samples=num_samples,
-                        ),
-                        Orientationd(keys=["image", "label"], axcodes="PLI"),
-                        SpatialPadd(
-                            keys=["image", "label"],
-                            spatial_size=(
-                                utils.get_padding_dim(self.config.sample_size)
-                            ),
-                        ),
-                        QuantileNormalizationd(keys=["image"]),
-                        EnsureTyped(keys=["image"]),
-                    ]
-                )
-
             if do_sampling:
                 # if there is only one volume, split samples
                 # TODO(cyril) : maybe implement something in user config to toggle this behavior
@@ -1340,35 +1540,44 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                         )
                         num_val_samples = 2
 
-                    sample_loader_train = get_patch_loader_func(
-                        num_train_samples
+                    sample_loader_train = self._get_patch_loader(
+                        self.config.sample_size, num_train_samples
+                    )
+                    sample_loader_eval = self._get_patch_loader(
+                        self.config.sample_size, num_val_samples
                     )
-                    sample_loader_eval = get_patch_loader_func(num_val_samples)
                 else:
                     num_train_samples = (
                         num_val_samples
                     ) = self.config.num_samples
 
-                    sample_loader_train = get_patch_loader_func(
-                        num_train_samples
+                    sample_loader_train = self._get_patch_loader(
+                        self.config.sample_size, num_train_samples
+                    )
+                    sample_loader_eval = self._get_patch_loader(
+                        self.config.sample_size, num_val_samples
                     )
-                    sample_loader_eval = get_patch_loader_func(num_val_samples)
 
                 logger.debug(f"AMOUNT of train samples : {num_train_samples}")
                 logger.debug(
                     f"AMOUNT of validation samples : {num_val_samples}"
                 )
 
+                load_volumes = self._get_volume_loader()
                 logger.debug("train_ds")
                 train_dataset = PatchDataset(
-                    data=self.train_files,
+                    data=CacheDataset(
+                        data=self.train_files, transform=load_volumes
+                    ),
                     transform=train_transforms,
                     patch_func=sample_loader_train,
                     samples_per_image=num_train_samples,
                 )
                 logger.debug("val_ds")
                 validation_dataset = PatchDataset(
-                    data=self.val_files,
+                    data=CacheDataset(
+                        data=self.val_files, transform=load_volumes
+                    ),
                     transform=val_transforms,
                     patch_func=sample_loader_eval,
                     samples_per_image=num_val_samples,
@@ -1401,26 +1610,53 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                     data=self.val_files, transform=load_whole_images
                 )
             logger.debug("Dataloader")
+            # cached volumes would be copied into each worker process on
+            # spawn platforms, a thread prepares the patches instead
+            loader_class = ThreadDataLoader if do_sampling else DataLoader
+            train_workers = (
+                0
+                if do_sampling
+                else self._get_num_workers(len(self.train_files))
+            )
+            # validation runs less often and needs fewer workers
+            val_workers = (
+                min(max(1, train_workers // 2), max(1, len(self.val_files)))
+                if train_workers > 0
+                else 0
+            )
+
+            def get_loader_kwargs(num_workers):
+                loader_kwargs = {
+                    "num_workers": num_workers,
+                    # page-locked batches allow asynchronous copies to the GPU
+                    "pin_memory": device.type == "cuda",
+                }
+                if num_workers > 0:
+                    # keep workers alive across epochs and batches queued ahead
+                    loader_kwargs["persistent_workers"] = True
+                    loader_kwargs["prefetch_factor"] = 4
+                return loader_kwargs
+
             try:
-                train_loader = DataLoader(
+                train_loader = loader_class(
                     train_dataset,
                     batch_size=self.config.batch_size,
                     shuffle=True,
-                    num_workers=self.config.num_workers,
                     collate_fn=pad_list_data_collate,
+                    **get_loader_kwargs(train_workers),
                 )
             except ValueError:
-                train_loader = DataLoader(
+                train_loader = loader_class(
                     train_dataset,
                     batch_size=self.config.batch_size,
-                    num_workers=self.config.num_workers,
                     collate_fn=pad_list_data_collate,
+                    **get_loader_kwargs(train_workers),
                 )
 
-            validation_loader = DataLoader(
+            validation_loader = loader_class(
                 validation_dataset,
                 batch_size=self.config.batch_size,
-                num_workers=self.config.num_workers,
+                **get_loader_kwargs(val_workers),
             )
             logger.debug("\nDone")
 
@@ -1451,6 +1687,8 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             dice_metric = DiceMetric(
                 include_background=False, reduction="mean", ignore_empty=False
             )
+            # TODO : more parameters/flexibility
+            post_pred = Threshold(threshold=0.5)
 
             best_metric = -1
             best_metric_epoch = -1
@@ -1500,6 +1738,32 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             if provided_loss is not None:
                 self.loss_function = provided_loss
 
+            # mixed precision on GPU, the scaler avoids fp16 gradient underflow
+            use_amp = device.type == "cuda"
+            scaler = torch.cuda.amp.GradScaler(enabled=use_amp)
+            compile_pending = train_model is not model
+
+            def train_step(step_model, inputs, labels):
+                """Runs the forward and backward passes of a training step and returns the loss."""
+                with torch.autocast(
+                    device_type=device.type,
+                    dtype=torch.float16,
+                    enabled=use_amp,
+                ):
+                    outputs = step_model(inputs)
+                    # logger.debug(f"Output dimensions : {outputs.shape}")
+                    if outputs.shape[1] > 1:
+                        outputs = outputs[
+                            :, 1:, :, :
+                        ]  # TODO(cyril): adapt if additional channels
+                        if len(outputs.shape) < 4:
+                            outputs = outputs.unsqueeze(0)
+                    # logger.debug(f"Outputs shape : {outputs.shape}")
+                    loss = self.loss_function(outputs, labels)
+
+                scaler.scale(loss).backward()
+                return loss
+
             # if model_name == "test":
             #     self.quit()
             #     yield TrainingReport(False)
@@ -1520,46 +1784,49 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                     self.log(f"Cached: {reserved_mem}GB")
 
                 model.train()
-                epoch_loss = 0
-                step = 0
-                for batch_data in train_loader:
-                    step += 1
-                    inputs, labels = (
-                        batch_data["image"].to(device),
-                        batch_data["label"].to(device),
-                    )
+                # kept on the device, read back once at the end of the epoch
+                step_losses = []
+                for batch_data in CUDAPrefetcher(train_loader, device):
+                    inputs, labels = batch_data["image"], batch_data["label"]
+                    if gpu_augmentation is not None:
+                        augmented = [
+                            gpu_augmentation({"image": image, "label": label})
+                            for image, label in zip(inputs, labels)
+                        ]
+                        inputs = torch.stack([a["image"] for a in augmented])
+                        labels = torch.stack([a["label"] for a in augmented])
                     # logger.debug(f"Inputs shape : {inputs.shape}")
                     # logger.debug(f"Labels shape : {labels.shape}")
                     if self.labels_not_semantic:
                         labels = labels.clamp(0, 1)
+                    if use_channels_last:
+                        inputs = inputs.contiguous(
+                            memory_format=torch.channels_last_3d
+                        )
 
-                    optimizer.zero_grad()
-                    outputs = model(inputs)
-                    # logger.debug(f"Output dimensions : {outputs.shape}")
-                    if outputs.shape[1] > 1:
-                        outputs = outputs[
-                            :, 1:, :, :
-                        ]  # TODO(cyril): adapt if additional channels
-                        if len(outputs.shape) < 4:
-                            outputs = outputs.unsqueeze(0)
-                    # logger.debug(f"Outputs shape : {outputs.shape}")
-                    loss = self.loss_function(outputs, labels)
-
-                    if WANDB_INSTALLED:
-                        wandb.log({"Training/Loss": loss.item()})
-
-                    loss.backward()
-                    optimizer.step()
-                    epoch_loss += loss.detach().item()
-                    self.log(
-                        f"* {step}/{len(train_dataset) // train_loader.batch_size}, "
-                        f"Train loss: {loss.detach().item():.4f}"
-                    )
+                    optimizer.zero_grad(set_to_none=True)
+                    if compile_pending:
+                        # the compiled model is built on the first forward
+                        # and backward passes, errors only show up there
+                        try:
+                            loss = train_step(train_model, inputs, labels)
+                        except Exception as e:
+                            train_model = self._use_eager_model(model, e)
+                            optimizer.zero_grad(set_to_none=True)
+                            loss = train_step(train_model, inputs, labels)
+                        compile_pending = False
+                    else:
+                        loss = train_step(train_model, inputs, labels)
+                    scaler.step(optimizer)
+                    scaler.update()
+                    step_losses.append(loss.detach())
 
                     if self._abort_requested:
                         self.log("Aborting training...")
                         model = None
                         del model
+                        train_model = None
+                        del train_model
                         train_loader = None
                         del train_loader
                         validation_loader = None
@@ -1580,8 +1847,13 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                         supervised=True,
                     )
 
+                step_losses = torch.stack(step_losses).float()
+                epoch_loss = step_losses.mean().item()
+
                 if WANDB_INSTALLED:
-                    wandb.log({"Training/Epoch loss": epoch_loss / step})
+                    for step_loss in step_losses.tolist():
+                        wandb.log({"Training/Loss": step_loss})
+                    wandb.log({"Training/Epoch loss": epoch_loss})
                     wandb.log(
                         {
                             "LR/Model learning rate": optimizer.param_groups[
@@ -1590,7 +1862,6 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                         }
                     )
 
-                epoch_loss /= step
                 epoch_loss_values.append(epoch_loss)
                 self.log(f"Epoch: {epoch + 1}, Average loss: {epoch_loss:.4f}")
 
@@ -1614,15 +1885,21 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                 ):
                     model.eval()
                     self.log("Performing validation...")
-                    with torch.no_grad():
-                        for val_data in validation_loader:
+                    with torch.inference_mode():
+                        for val_data in CUDAPrefetcher(
+                            validation_loader, device
+                        ):
                             val_inputs, val_labels = (
-                                val_data["image"].to(device),
-                                val_data["label"].to(device),
+                                val_data["image"],
+                                val_data["label"],
                             )
 
                             try:
-                                with torch.no_grad():
+                                with torch.autocast(
+                                    device_type=device.type,
+                                    dtype=torch.float16,
+                                    enabled=use_amp,
+                                ):
                                     val_outputs = sliding_window_inference(
                                         val_inputs,
                                         roi_size=size,
@@ -1635,6 +1912,8 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                                         device=self.config.device,
                                         progress=False,
                                     )
+                                # keep metrics and displayed outputs in fp32
+                                val_outputs = val_outputs.float()
                             except Exception as e:
                                 self.raise_error(e, "Error during validation")
 
@@ -1643,43 +1922,19 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                             )
                             # val_outputs = model(val_inputs)
 
-                            pred = decollate_batch(val_outputs)
-                            labs = decollate_batch(val_labels)
-                            # TODO : more parameters/flexibility
-                            post_pred = Compose(
-                                [
-                                    RemapTensor(new_max=1, new_min=0),
-                                    Threshold(threshold=0.5),
-                                    EnsureType(),
-                                ]
-                            )  #
-                            post_label = EnsureType()
-
-                            output_raw = [
-                                RemapTensor(new_max=1, new_min=0)(t)
-                                for t in pred
-                            ]
-                            # output_raw = pred
-
-                            val_outputs = [
-                                post_pred(res_tensor) for res_tensor in pred
-                            ]
-
-                            val_labels = [
-                                post_label(res_tensor) for res_tensor in labs
-                            ]
-
-                            # logger.debug(len(val_outputs))
-                            # logger.debug(len(val_labels))
-                            # dice_test = np.array(
-                            #     [
-                            #         utils.dice_coeff(i, j)
-                            #         for i, j in zip(val_outputs, val_labels)
-                            #     ]
-                            # )
-                            # logger.debug(
-                            #     f"TEST VALIDATION Dice score : {dice_test.mean()}"
-                            # )
+                            # the batch is post-processed at once : each
+                            # sample is remapped to [0, 1] then thresholded
+                            spatial_dims = tuple(range(1, val_outputs.ndim))
+                            output_min = val_outputs.amin(
+                                dim=spatial_dims, keepdim=True
+                            )
+                            output_max = val_outputs.amax(
+                                dim=spatial_dims, keepdim=True
+                            )
+                            output_raw = (val_outputs - output_min) / (
+                                output_max - output_min
+                            )
+                            val_outputs = post_pred(output_raw)
 
                             dice_metric(y_pred=val_outputs, y=val_labels)
 
@@ -1748,15 +2003,14 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
                         if metric > best_metric:
                             best_metric = metric
                             best_metric_epoch = epoch + 1
-                            self.log("Saving best metric model")
-                            torch.save(
-                                model.state_dict(),
+                            self.log("Saving best metric model in background")
+                            self._save_weights_async(
+                                model,
                                 Path(self.config.results_path_folder)
                                 / Path(
                                     weights_filename,
                                 ),
                             )
-                            self.log("Saving complete")
                         self.log(
                             f"Current epoch: {epoch + 1}, Current mean dice: {metric:.4f}"
                             f"\nBest mean dice: {best_metric:.4f} "
@@ -1775,18 +2029,22 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             # Save last checkpoint
             weights_filename = f"{model_name}_latest.pth"
             self.log("Saving last model")
+            self._wait_for_saves()
             torch.save(
                 model.state_dict(),
                 Path(self.config.results_path_folder) / Path(weights_filename),
             )
             self.log("Saving complete, exiting")
-            model.to("cpu")
+            if provided_model is not None:
+                model.to("cpu")
 
             if WANDB_INSTALLED:
                 wandb.finish()
             # clear (V)RAM
             model = None
             del model
+            train_model = None
+            del train_model
             train_loader = None
             del train_loader
             validation_loader = None
@@ -1804,4 +2062,10 @@ class SupervisedTrainingWorker(TrainingWorkerBase):
             self.raise_error(e, "Error in training")
             self.quit()
         finally:
+            self._close_saves()
+            (
+                torch.backends.cudnn.benchmark,
+                torch.backends.cudnn.allow_tf32,
+                torch.backends.cuda.matmul.allow_tf32,
+            ) = backend_flags
             self.quit()
@@ -22,6 +22,8 @@ if TYPE_CHECKING:
 PRETRAINED_WEIGHTS_DIR = Path(__file__).parent.resolve() / Path(
     "models/pretrained"
 )
+TENSORRT_CACHE_DIR = Path.home() / "cellseg3d" / "tensorrt_cache"
+"""Where TensorRT engines built for ONNX models are cached, model folders may be read-only"""
 
 
 class WeightsDownloader:
@@ -179,16 +181,68 @@ class ONNXModelWrapper(torch.nn.Module):
             logger.error(msg)
             raise ImportError(msg) from e
 
-        self.ort_session = ort.InferenceSession(
-            file_location,
-            providers=["CUDAExecutionProvider", "CPUExecutionProvider"],
+        available_providers = ort.get_available_providers()
+        self._file_location = file_location
+        providers = self._fallback_providers = [
+            provider
+            for provider in ["CUDAExecutionProvider", "CPUExecutionProvider"]
+            if provider in available_providers
+        ]
+        self.ort_session = None
+        if "TensorrtExecutionProvider" in available_providers:
+            # FP16 engine, built once for the input shape and cached on disk
+            try:
+                TENSORRT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                self.ort_session = self._create_session(
+                    file_location,
+                    [
+                        (
+                            "TensorrtExecutionProvider",
+                            {
+                                "trt_fp16_enable": True,
+                                "trt_engine_cache_enable": True,
+                                "trt_engine_cache_path": str(
+                                    TENSORRT_CACHE_DIR
+                                ),
+                            },
+                        ),
+                        *providers,
+                    ],
+                )
+            except Exception as e:
+                self._warn_tensorrt_failed(e)
+        if self.ort_session is None:
+            self.ort_session = self._create_session(file_location, providers)
+
+    @staticmethod
+    def _create_session(file_location, providers):
+        import onnxruntime as ort
+
+        logger.debug(f"ONNX providers : {providers}")
+        return ort.InferenceSession(file_location, providers=providers)
+
+    def _warn_tensorrt_failed(self, error):
+        logger.warning(
+            f"Could not use TensorRT, falling back to {self._fallback_providers} : {error}"
         )
 
     def forward(self, modeL_input):
         """Wraps ONNX output in a torch tensor."""
-        outputs = self.ort_session.run(
-            None, {"input": modeL_input.cpu().numpy()}
-        )
+        inputs = {"input": modeL_input.cpu().numpy()}
+        try:
+            outputs = self.ort_session.run(None, inputs)
+        except Exception as e:
+            # TensorRT engines may only be built on the first run
+            if (
+                "TensorrtExecutionProvider"
+                not in self.ort_session.get_providers()
+            ):
+                raise
+            self._warn_tensorrt_failed(e)
+            self.ort_session = self._create_session(
+                self._file_location, self._fallback_providers
+            )
+            outputs = self.ort_session.run(None, inputs)
         return torch.tensor(outputs[0])
 
     def eval(self):
@@ -221,8 +275,12 @@ class QuantileNormalizationd(MapTransform):
         return d
 
     def normalizer(self, image: torch.Tensor):
-        """Normalize each image in a batch individually by quantile normalization."""
+        """Normalize each image in a batch individually by quantile normalization.
+
+        Returns a new tensor, the input may be shared with a dataset cache.
+        """
         if image.ndim == 4:
+            image = image.clone()
             for i in range(image.shape[0]):
                 image[i] = utils.quantile_normalization(image[i])
         else:
@@ -296,6 +354,64 @@ class Threshold(Transform):
         return torch.Tensor(res).float()
 
 
+class CUDAPrefetcher:
+    """Iterates over a DataLoader, moving the batches to the device.
+
+    On CUDA, the next batch is copied on a side stream while the current one is being used,
+    which requires the DataLoader to use pinned memory. On CPU, batches are simply moved in turn.
+    """
+
+    def __init__(self, loader, device, keys=("image", "label")):
+        """Creates a CUDAPrefetcher.
+
+        Args:
+            loader (torch.utils.data.DataLoader): loader yielding dict batches
+            device (torch.device): device to move the batches to
+            keys (tuple): keys of the batch dicts to move
+        """
+        self.loader = loader
+        self.device = device
+        self.keys = keys
+        self.stream = (
+            torch.cuda.Stream(device) if device.type == "cuda" else None
+        )
+
+    def __len__(self):
+        """Number of batches in the loader."""
+        return len(self.loader)
+
+    def _to_device(self, batch):
+        for key in self.keys:
+            batch[key] = batch[key].to(self.device, non_blocking=True)
+        return batch
+
+    def _preload(self, loader_iter):
+        batch = next(loader_iter, None)
+        if batch is None:
+            return None
+        with torch.cuda.stream(self.stream):
+            return self._to_device(batch)
+
+    def __iter__(self):
+        """Yields the batches of the loader, on the device."""
+        if self.stream is None:
+            for batch in self.loader:
+                yield self._to_device(batch)
+            return
+
+        loader_iter = iter(self.loader)
+        next_batch = self._preload(loader_iter)
+        while next_batch is not None:
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(self.stream)
+            batch = next_batch
+            for key in self.keys:
+                # memory was allocated on the side stream
+                batch[key].record_stream(current_stream)
+            next_batch = self._preload(loader_iter)
+            yield batch
+
+
 @dataclass
 class InferenceResult:
     """Class to record results of a segmentation job."""
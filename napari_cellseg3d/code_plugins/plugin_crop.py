@@ -1,12 +1,15 @@
 """Crop utility plugin for napari_cellseg3d."""
+from functools import partial
 from math import floor
 from pathlib import Path
 
+import dask.array as da
 import napari
 import numpy as np
 from magicgui import magicgui
 
 # Qt
+from qtpy.QtCore import QTimer
 from qtpy.QtWidgets import QSizePolicy
 
 # local
@@ -15,9 +18,32 @@ from napari_cellseg3d import utils
 from napari_cellseg3d.code_plugins.plugin_base import BasePluginSingleImage
 
 DEFAULT_CROP_SIZE = 64
+SLIDER_UPDATE_INTERVAL_MS = 16  # at most one crop update per frame at 60 Hz
 logger = utils.LOGGER
 
 
+def _get_crop(stack, start, size, out=None):
+    """Returns the region of ``stack`` of the given ``size`` starting at ``start``.
+
+    Only the cropped region is read if the stack is lazily loaded (e.g. dask array).
+    If ``out`` has the shape of the crop, a lazy crop is read into it instead of a new array.
+    """
+    region = tuple(slice(s, s + c) for s, c in zip(start, size))
+    crop = stack[region]
+    if isinstance(crop, da.Array):
+        if out is not None and out.shape == crop.shape:
+            da.store(crop, out, lock=False, scheduler="synchronous")
+            return out
+        # the synchronous scheduler avoids thread pool overhead for one crop
+        return crop.compute(scheduler="synchronous")
+    return np.asarray(crop)
+
+
+def _full_resolution(layer):
+    """Returns the data of ``layer``, using the highest resolution level of multiscale layers."""
+    return layer.data[0] if layer.multiscale else layer.data
+
+
 class Cropping(
     BasePluginSingleImage
 ):  # not a BasePLuginUtils since it's not runnning on folders
@@ -108,6 +134,14 @@ class Cropping(
         self._z = 0
         self.sliders = []
 
+        # slider moves are coalesced, only the latest positions are cropped
+        self._pending_slices = {}
+        self._set_slice = None
+        self._slice_timer = QTimer(self)
+        self._slice_timer.setSingleShot(True)
+        self._slice_timer.setInterval(SLIDER_UPDATE_INTERVAL_MS)
+        self._slice_timer.timeout.connect(self._apply_pending_slices)
+
         self._crop_size_x = DEFAULT_CROP_SIZE
         self._crop_size_y = DEFAULT_CROP_SIZE
         self._crop_size_z = DEFAULT_CROP_SIZE
@@ -243,23 +277,43 @@ class Cropping(
 
         im1_path = str(
             self.results_path
-            / Path("cropped_" + self.image_layer1.name + time)
+            / Path("cropped_" + self.image_layer1.name + time + ".tif")
         )
 
-        viewer.layers[f"cropped_{self.image_layer1.name}"].save(im1_path)
+        utils.save_compressed_tif(
+            im1_path, viewer.layers[f"cropped_{self.image_layer1.name}"].data
+        )
 
         logger.info(f"Image 1 saved as: {im1_path}")
 
         if self.crop_second_image:
             im2_path = str(
                 self.results_path
-                / Path("cropped_" + self.image_layer2.name + time)
+                / Path("cropped_" + self.image_layer2.name + time + ".tif")
             )
 
-            viewer.layers[f"cropped_{self.image_layer2.name}"].save(im2_path)
+            utils.save_compressed_tif(
+                im2_path,
+                viewer.layers[f"cropped_{self.image_layer2.name}"].data,
+            )
 
             logger.info(f"Image 2 saved as: {im2_path}")
 
+    def _queue_slice(self, axis, value):
+        """Records the latest value of a slider, to be applied when the update timer fires."""
+        self._pending_slices[axis] = value
+        if not self._slice_timer.isActive():
+            self._slice_timer.start()
+
+    def _apply_pending_slices(self):
+        """Moves the cropped volume to the latest recorded slider values."""
+        pending = self._pending_slices
+        self._pending_slices = {}
+        if self._set_slice is None:
+            return
+        for axis, value in pending.items():
+            self._set_slice(axis, value)
+
     def _check_ready(self):
         if self.image_layer_loader.layer_data() is not None:
             if self.crop_second_image:
@@ -298,13 +352,19 @@ class Cropping(
 
         self.image_layer1 = self.image_layer_loader.layer()
 
-        if len(self.image_layer1.data) > 3:
+        if (
+            not self.image_layer1.multiscale
+            and len(self.image_layer1.data.shape) > 3
+        ):
             self.image_layer1.data = np.squeeze(self.image_layer1.data)
 
         if self.crop_second_image:
             self.image_layer2 = self.label_layer_loader.layer()
 
-            if len(self.image_layer2.data.shape) > 3:
+            if (
+                not self.image_layer2.multiscale
+                and len(self.image_layer2.data.shape) > 3
+            ):
                 self.image_layer2.data = np.squeeze(
                     self.image_layer2.data
                 )  # if channel/batch remnants from MONAI
@@ -398,7 +458,9 @@ class Cropping(
     #         layer.refresh()
 
     def _add_crop_layer(self, layer, cropx, cropy, cropz):
-        crop_data = layer.data[:cropx, :cropy, :cropz]
+        crop_data = _get_crop(
+            _full_resolution(layer), (0, 0, 0), (cropx, cropy, cropz)
+        )
 
         if isinstance(layer, napari.layers.Image):
             new_layer = self._viewer.add_image(
@@ -433,7 +495,7 @@ class Cropping(
         # https://forum.image.sc/t/napari-viewing-3d-image-of-large-tif-stack-cropping-image-w-general-shape/55500/2
         vw = self._viewer
 
-        im1_stack = self.image_layer1.data
+        im1_stack = _full_resolution(self.image_layer1)
 
         self._crop_size_x, self._crop_size_y, self._crop_size_z = [
             box.value() for box in self.crop_size_widgets
@@ -467,9 +529,12 @@ class Cropping(
                 )
 
         cropx, cropy, cropz = crop_sizes
-        ends = np.asarray(im1_stack.shape) - np.asarray(crop_sizes) + 1
-
-        stepsizes = ends // 100
+        ends = [
+            size - crop_size + 1
+            for size, crop_size in zip(im1_stack.shape, crop_sizes)
+        ]
+        # small volumes would otherwise get a step of 0
+        stepsizes = [max(1, end // 100) for end in ends]
 
         # logger.debug(crop_sizes)
         # logger.debug(ends)
@@ -487,11 +552,27 @@ class Cropping(
         )
 
         if self.crop_second_image:
-            im2_stack = self.image_layer2.data
+            im2_stack = _full_resolution(self.image_layer2)
             self.im2_crop_layer = self._add_crop_layer(
                 self.image_layer2, cropx, cropy, cropz
             )
 
+        # constant while the sliders exist, no need to read them on each move
+        scale = np.asarray(self.im1_crop_layer.scale)
+        max_i, max_j, max_k = im1_stack.shape[:3]
+        izyx = [0, 0, 0]  # crop layers are created at the origin
+        # lazy stacks are read into reused buffers, numpy stacks are viewed
+        im1_buffer = (
+            np.empty(crop_sizes, dtype=im1_stack.dtype)
+            if isinstance(im1_stack, da.Array)
+            else None
+        )
+        im2_buffer = (
+            np.empty(crop_sizes, dtype=im2_stack.dtype)
+            if self.crop_second_image and isinstance(im2_stack, da.Array)
+            else None
+        )
+
         def set_slice(
             axis,
             value,
@@ -505,50 +586,40 @@ class Cropping(
             # logger.debug(f"axis : {axis}")
             # logger.debug(f"value : {value}")
 
-            idx = int(value)
-            scale = np.asarray(highres_crop_layer.scale)
-            translate = np.asarray(highres_crop_layer.translate)
-            izyx = translate // scale
-            izyx[axis] = idx
-            izyx = [int(var) for var in izyx]
+            izyx[axis] = int(value)
             i, j, k = izyx
 
             cropx = self._crop_size_x
             cropy = self._crop_size_y
             cropz = self._crop_size_z
 
-            if i + cropx > im1_stack.shape[0]:
-                cropx = im1_stack.shape[0] - i
-            if j + cropy > im1_stack.shape[1]:
-                cropy = im1_stack.shape[1] - j
-            if k + cropz > im1_stack.shape[2]:
-                cropz = im1_stack.shape[2] - k
-
-            logger.debug(f"cropx : {cropx}")
-            logger.debug(f"cropy : {cropy}")
-            logger.debug(f"cropz : {cropz}")
-            logger.debug(f"i : {i}")
-            logger.debug(f"j : {j}")
-            logger.debug(f"k : {k}")
-
-            highres_crop_layer.data = im1_stack[
-                i : i + cropx, j : j + cropy, k : k + cropz
-            ]
-            highres_crop_layer.translate = scale * izyx
+            if i + cropx > max_i:
+                cropx = max_i - i
+            if j + cropy > max_j:
+                cropy = max_j - j
+            if k + cropz > max_k:
+                cropz = max_k - k
+
+            logger.debug(f"crop : {cropx}, {cropy}, {cropz} at {i}, {j}, {k}")
+
+            translate = scale * izyx
+            crop_size = (cropx, cropy, cropz)
+            # move first, the data setter then refreshes the layer once
+            highres_crop_layer.translate = translate
+            highres_crop_layer.data = _get_crop(
+                im1_stack, izyx, crop_size, out=im1_buffer
+            )
             highres_crop_layer.reset_contrast_limits()
-            highres_crop_layer.refresh()
 
             # self._check_for_empty_layer(
             #     highres_crop_layer, highres_crop_layer.data
             # )
 
             if crop_lbls and labels_crop_layer is not None:
-                labels_crop_layer.data = im2_stack[
-                    i : i + cropx, j : j + cropy, k : k + cropz
-                ]
-                labels_crop_layer.translate = scale * izyx
-                highres_crop_layer.reset_contrast_limits()
-                labels_crop_layer.refresh()
+                labels_crop_layer.translate = translate
+                labels_crop_layer.data = _get_crop(
+                    im2_stack, izyx, crop_size, out=im2_buffer
+                )
 
             self._x = i
             self._y = j
@@ -562,16 +633,15 @@ class Cropping(
             for axis, end, step in zip("zyx", ends, stepsizes)
         ]
         self.sliders = sliders
+        self._pending_slices = {}
+        self._set_slice = partial(
+            set_slice,
+            highres_crop_layer=self.im1_crop_layer,
+            labels_crop_layer=self.im2_crop_layer,
+            crop_lbls=self.crop_second_image,
+        )
         for axis, slider in enumerate(sliders):
-            slider.valueChanged.connect(
-                lambda event, axis=axis: set_slice(
-                    axis,
-                    event,
-                    self.im1_crop_layer,
-                    self.im2_crop_layer,
-                    self.crop_second_image,
-                )
-            )
+            slider.valueChanged.connect(partial(self._queue_slice, axis))
         container_widget = ui.ContainerWidget(parent=self)
         # Container(layout="vertical")
         # container_widget.extend(sliders)
@@ -17,6 +17,9 @@ from napari_cellseg3d.code_models.instance_segmentation import (
 )
 from napari_cellseg3d.code_models.model_framework import ModelFramework
 from napari_cellseg3d.code_models.worker_inference import InferenceWorker
+from napari_cellseg3d.code_models.worker_training import (
+    SupervisedTrainingWorker,
+)
 from napari_cellseg3d.code_models.workers_utils import InferenceResult
 from napari_cellseg3d.code_plugins.plugin_crf import CRFParamsWidget
 
@@ -806,6 +809,8 @@ class Inferer(ModelFramework, metaclass=ui.QWidgetSingleton):
             self._set_worker_config()
             if self.worker_config is None:
                 raise RuntimeError("Worker config was not set correctly")
+            # frees the GPU memory held by the last training run
+            SupervisedTrainingWorker.clear_model_cache()
             self._setup_worker()
             self.btn_close.setVisible(False)
 
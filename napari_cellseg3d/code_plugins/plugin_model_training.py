@@ -151,6 +151,8 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
         """Plot for loss"""
         self.plot_2 = None
         """Plot for dice metric"""
+        self._plot_artists = {}
+        """Lines and markers of the plots, updated in place on each validation"""
         self.plot_dock = None
         """Docked widget with plots"""
         self.result_layers: List[napari.layers.Layer] = []
@@ -1274,6 +1276,11 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
         self.start_btn.setText("Start")
         [btn.setVisible(True) for btn in self.close_buttons]
 
+    def remove_from_viewer(self):
+        """Removes the widget from the napari window and releases the model kept from the last training run."""
+        SupervisedTrainingWorker.clear_model_cache()
+        super().remove_from_viewer()
+
     def _remove_result_layers(self):
         for layer in self.result_layers:
             try:
@@ -1446,10 +1453,14 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
         )
         self.df.to_csv(path, index=False)
 
-    def _show_plot_max(self, plot, y):
+    def _show_plot_max(self, plot, y, key):
         x_max = (np.argmax(y) + 1) * self.worker_config.validation_interval
         dice_max = np.max(y)
-        plot.scatter(
+        marker = self._plot_artists.get(key)
+        if marker is not None:
+            marker.set_offsets([[x_max, dice_max]])
+            return
+        self._plot_artists[key] = plot.scatter(
             x_max,
             dice_max,
             c="r",
@@ -1457,13 +1468,26 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
             zorder=5,
         )
 
+    def _update_line(self, plot, key, x, y, **kwargs):
+        """Updates the data of the line stored under ``key``, creating it if needed.
+
+        Returns:
+            bool: whether the line was created
+        """
+        line = self._plot_artists.get(key)
+        if line is not None:
+            line.set_data(x, y)
+            return False
+        (self._plot_artists[key],) = plot.plot(x, y, **kwargs)
+        return True
+
     def _plot_loss(
         self,
         loss_values_1: dict,
         loss_values_2: list,
         show_plot_2_max: bool = True,
     ):
-        """Creates two subplots to plot the training loss and validation metric."""
+        """Creates two subplots to plot the training loss and validation metric, or updates their lines."""
         plot_key = (
             "supervised"
             if self._is_current_job_supervised()
@@ -1475,6 +1499,7 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
             self.plot_1.set_xlabel("Epoch")
             self.plot_1.set_ylabel(self.plot_2_labels["ylabel"][plot_key])
 
+            created = False
             for metric_name in list(loss_values_1.keys()):
                 if metric_name == "Dice metric":
                     x = [
@@ -1484,13 +1509,21 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
                 else:
                     x = [i + 1 for i in range(len(loss_values_1[metric_name]))]
                 y = loss_values_1[metric_name]
-                self.plot_1.plot(x, y, label=metric_name)
+                created |= self._update_line(
+                    self.plot_1,
+                    ("plot_1", metric_name),
+                    x,
+                    y,
+                    label=metric_name,
+                )
                 if metric_name == "Dice metric":
-                    self._show_plot_max(self.plot_1, y)
-            if len(loss_values_1.keys()) > 1:
+                    self._show_plot_max(self.plot_1, y, ("plot_1", "max"))
+            if created and len(loss_values_1.keys()) > 1:
                 self.plot_1.legend(
                     loc="lower left", fontsize="10", markerscale=0.6
                 )
+            self.plot_1.relim()
+            self.plot_1.autoscale_view()
 
             # update plot 2
             if self._is_current_job_supervised():
@@ -1502,15 +1535,22 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
                 x = [int(i + 1) for i in range(len(loss_values_2))]
             y = loss_values_2
 
-            self.plot_2.plot(x, y, zorder=1)
+            created = self._update_line(
+                self.plot_2, ("plot_2", "values"), x, y, zorder=1
+            )
             # self.dice_metric_plot.set_ylim(0, 1)
             self.plot_2.set_title(self.plot_2_labels["title"][plot_key])
             self.plot_2.set_xlabel("Epoch")
             self.plot_2.set_ylabel(self.plot_2_labels["ylabel"][plot_key])
 
             if show_plot_2_max:
-                self._show_plot_max(self.plot_2, y)
-                self.plot_2.legend(facecolor=ui.napari_grey, loc="lower right")
+                self._show_plot_max(self.plot_2, y, ("plot_2", "max"))
+                if created:
+                    self.plot_2.legend(
+                        facecolor=ui.napari_grey, loc="lower right"
+                    )
+            self.plot_2.relim()
+            self.plot_2.autoscale_view()
             self.canvas.draw_idle()
 
     def update_loss_plot(self, loss_1: dict, loss_2: list):
@@ -1528,6 +1568,7 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
         if epoch < self.worker_config.validation_interval * 2:
             return
         if epoch == self.worker_config.validation_interval * 2:
+            self._plot_artists = {}
             bckgrd_color = (0, 0, 0, 0)  # '#262930'
             with plt.style.context("dark_background"):
                 self.canvas = FigureCanvas(Figure(figsize=(10, 1.5)))
@@ -1570,16 +1611,15 @@ class Trainer(ModelFramework, metaclass=ui.QWidgetSingleton):
                 )
             self._plot_loss(loss_1, loss_2, show_plot_2_max=plot_max)
         else:
-            with plt.style.context("dark_background"):
-                self.plot_1.cla()
-                self.plot_2.cla()
-                self._plot_loss(loss_1, loss_2, show_plot_2_max=plot_max)
+            # lines are updated in place rather than redrawn from scratch
+            self._plot_loss(loss_1, loss_2, show_plot_2_max=plot_max)
 
     def _reset_loss_plot(self):
         if self.plot_1 is not None and self.plot_2 is not None:
             with plt.style.context("dark_background"):
                 self.plot_1.cla()
                 self.plot_2.cla()
+        self._plot_artists = {}
 
 
 class LearningRateWidget(ui.ContainerWidget):
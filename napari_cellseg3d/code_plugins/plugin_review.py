@@ -12,7 +12,6 @@ from matplotlib.figure import Figure
 
 # Qt
 from qtpy.QtWidgets import QLineEdit, QSizePolicy
-from tifffile import imwrite
 
 # local
 from napari_cellseg3d import config, utils
@@ -52,6 +51,8 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
 
         # self._viewer = viewer # should not be needed
         self.config = config.ReviewConfig()
+        self._review_callbacks = None
+        """Viewer callbacks of the current review session, removed when a new one starts"""
         self.enable_utils_menu()
 
         #######################
@@ -72,7 +73,7 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
 
         self.warn_label = ui.make_label(
             "WARNING : You already have a review session running.\n"
-            "Launching another will close the current one,\n"
+            "Launching another will replace the current one,\n"
             " make sure to save your work beforehand",
             None,
         )
@@ -175,7 +176,12 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
         if cfg.image is None:
             raise ValueError("Review requires at least one image")
 
-        if cfg.labels is not None and cfg.image.shape != cfg.labels.shape:
+        image_shape = (
+            cfg.image[0].shape
+            if isinstance(cfg.image, list)
+            else cfg.image.shape
+        )
+        if cfg.labels is not None and image_shape != cfg.labels.shape:
             logger.warning(
                 "Image and label dimensions do not match ! Please load matching images"
             )
@@ -184,13 +190,37 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
         if self.layer_choice.isChecked():
             self.config.image = self.image_layer_loader.layer_data()
             self.config.labels = self.label_layer_loader.layer_data()
+            self.config.as_stack = False
         else:
-            self.config.image = utils.load_images(
-                self.image_filewidget.text_field.text()
+            image_path = self.image_filewidget.text_field.text()
+            labels_path = self.labels_filewidget.text_field.text()
+            # folders of slices are saved back as folders of slices,
+            # zarr stores are folders too but are not slices
+            self.config.as_stack = (
+                Path(image_path).is_dir()
+                and Path(image_path).suffix != ".zarr"
             )
-            self.config.labels = utils.load_images(
-                self.labels_filewidget.text_field.text()
+            self.config.image = utils.load_images(
+                image_path,
+                filetype=self.config.filetype,
+                as_folder=Path(image_path).is_dir(),
             )
+            if labels_path == "":
+                # empty labels are created in launch_review
+                self.config.labels = None
+            elif not Path(labels_path).exists():
+                raise ValueError(f"Labels not found at {labels_path}")
+            else:
+                labels = utils.load_images(
+                    labels_path,
+                    filetype=self.config.filetype,
+                    as_folder=Path(labels_path).is_dir(),
+                    lazy=False,
+                )
+                if isinstance(labels, list):  # multiscale, edit full res
+                    labels = labels[0]
+                # labels are kept in memory as they are edited during review
+                self.config.labels = np.asarray(labels)
 
         self.check_image_data()
         self._check_results_path(self.results_filewidget.text_field.text())
@@ -211,7 +241,7 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
         """Launches review process by loading the files from the chosen folders, and adds several widgets to the napari Viewer.
 
         If the review process has been launched once before,
-        closes the window entirely and launches the review process in a fresh window.
+        clears the layers and widgets of the previous session and reuses the same window.
 
         Todo:
         * Save work done before leaving
@@ -222,20 +252,26 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
             napari.viewer.Viewer: self.viewer
         """
         print("New review session\n" + "*" * 20)
-        previous_viewer = self._viewer
         try:
             self._prepare_data()
 
+            self._reset_review_state()
             self._viewer, self.docked_widgets = self.launch_review()
-            self._reset()
-            previous_viewer.close()
         except ValueError as e:
             logger.warning(
                 f"An exception occurred : {e}. Please ensure you have entered all required parameters."
             )
 
-    def _reset(self):
+    def _reset_review_state(self):
+        """Removes the layers, widgets and callbacks of the previous review session from the viewer."""
         self.remove_docked_widgets()
+        if self._review_callbacks is not None:
+            update_canvas, update_button = self._review_callbacks
+            if update_canvas in self._viewer.mouse_drag_callbacks:
+                self._viewer.mouse_drag_callbacks.remove(update_canvas)
+            self._viewer.dims.events.current_step.disconnect(update_button)
+            self._review_callbacks = None
+        self._viewer.layers.clear()
 
     def launch_review(self):
         """Launch the review process, loading the original image, the labels & the raw labels (from prediction) in the viewer.
@@ -256,15 +292,21 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
           to allow the user to have a better all-around view of the object
           and determine whether it should be labeled or not.
 
-        Returns : list of all docked widgets
+        Returns : the viewer and the list of all docked widgets
         """
         images_original = self.config.image
         if self.config.labels is not None:
             base_label = self.config.labels
         else:
-            base_label = np.zeros_like(images_original)
+            # only uses the image metadata, to avoid reading the whole volume
+            full_resolution = (
+                images_original[0]
+                if isinstance(images_original, list)
+                else images_original
+            )
+            base_label = np.zeros(full_resolution.shape, dtype=np.uint16)
 
-        viewer = napari.Viewer()
+        viewer = self._viewer
 
         viewer.scale_bar.visible = True
 
@@ -297,19 +339,18 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
             # logger.debug("The directory is:", out_dir)
 
             def quicksave():
-                # if not self.config.as_stack:
-                if viewer.layers["labels"] is not None:
+                if viewer.layers["labels"] is None:
+                    return
+                dat = viewer.layers["labels"].data
+                if self.config.as_stack:
+                    utils.save_stack(
+                        dat,
+                        Path(out_dir) / "labels_reviewed",
+                        filetype=self.config.filetype,
+                    )
+                else:
                     name = str(Path(out_dir) / "labels_reviewed.tif")
-                    dat = viewer.layers["labels"].data
-                    imwrite(name, data=dat)
-
-                # else:
-                #     if viewer.layers["labels"] is not None:
-                #         dir_name = os.path.join(str(out_dir), "labels_reviewed")
-                #         dat = viewer.layers["labels"].data
-                #         utils.save_stack(
-                #             dat, dir_name, filetype=self.config.filetype
-                #         )
+                    utils.save_compressed_tif(name, dat)
 
             return dirname, quicksave()
 
@@ -352,7 +393,6 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
         )
         canvas_dock._close_btn = False
 
-        @viewer.mouse_drag_callbacks.append
         def update_canvas(viewer, event):
             if "shift" in event.modifiers:
                 try:
@@ -395,6 +435,8 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
                 except Exception as e:
                     logger.exception(e)
 
+        viewer.mouse_drag_callbacks.append(update_canvas)
+
         # Qt widget defined in docker.py
         dmg = Datamanager(parent=viewer)
         dmg.prepare(
@@ -414,6 +456,7 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
             dmg.update_dm(slice_num)
 
         viewer.dims.events.current_step.connect(update_button)
+        self._review_callbacks = (update_canvas, update_button)
 
         def crop_volume_around_point(points, layer, zoom_factor):
             """Crops a volume around a point.
@@ -423,12 +466,13 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
                 layer (napari.layers.Image): the layer to crop
                 zoom_factor (list): list of 3 floats, the zoom factor to apply to the layer before cropping
             """
+            layer_data = layer.data[0] if layer.multiscale else layer.data
             if zoom_factor != [1, 1, 1]:
-                data = np.array(layer.data, dtype=np.int16)
+                data = np.array(layer_data, dtype=np.int16)
                 volume = utils.resize(data, zoom_factor)
                 # image = ndimage.zoom(layer.data, zoom_factor, mode="nearest") # cleaner but much slower...
             else:
-                volume = layer.data
+                volume = layer_data
 
             min_coordinates = [point - 50 for point in points]
             max_coordinates = [point + 50 for point in points]
@@ -463,4 +507,4 @@ class Reviewer(BasePluginSingleImage, metaclass=ui.QWidgetSingleton):
             ] = crop_temp
             return cropped_volume
 
-        return viewer, [file_widget, canvas, dmg]
+        return viewer, [file_widget_dock, canvas_dock, datamananger]
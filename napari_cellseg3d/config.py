@@ -53,6 +53,7 @@ class ReviewConfig:
         new_csv (bool): whether to create a new csv
         filetype (str): filetype to read & write review images
         zoom_factor (List[int]): zoom factor to apply to image & labels, if selected
+        as_stack (bool): whether to save reviewed labels as a folder of slices
     """
 
     image: np.array = None
@@ -62,6 +63,7 @@ class ReviewConfig:
     new_csv: bool = True
     filetype: str = ".tif"
     zoom_factor: List[int] = None
+    as_stack: bool = False
 
 
 @dataclass  # TODO create custom reader for JSON to load project
@@ -319,7 +321,7 @@ class TrainingWorkerConfig:
         num_samples (int): number of patches
         sample_size (List[int]): patch size
         do_augmentation (bool): whether to do augmentation
-        num_workers (int): number of workers
+        num_workers (int): number of workers, chosen from the CPU count and batch size if None
         train_data_dict (dict): dict of train data as {"image": np.array, "labels": np.array}
     """
 
@@ -339,7 +341,7 @@ class TrainingWorkerConfig:
     num_samples: int = 2
     sample_size: List[int] = None
     do_augmentation: bool = True
-    num_workers: int = 4
+    num_workers: int = None
     train_data_dict: dict = None
 
 
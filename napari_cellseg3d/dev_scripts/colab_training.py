@@ -247,7 +247,9 @@ class WNetTrainingWorkerColab(TrainingWorkerBase):
             dataset,
             batch_size=self.config.batch_size,
             shuffle=True,
-            num_workers=self.config.num_workers,
+            num_workers=self._get_num_workers(
+                len(self.config.train_data_dict)
+            ),
             collate_fn=pad_list_data_collate,
         )
 
@@ -258,7 +260,9 @@ class WNetTrainingWorkerColab(TrainingWorkerBase):
                 eval_dataset,
                 batch_size=self.config.batch_size,
                 shuffle=False,
-                num_workers=self.config.num_workers,
+                num_workers=self._get_num_workers(
+                    len(self.config.eval_volume_dict)
+                ),
                 collate_fn=pad_list_data_collate,
             )
         else:
@@ -1,16 +1,21 @@
 """Utilities functions, classes, and variables."""
 import logging
 import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Union
 
+import dask
+import dask.array as da
 import napari
 import numpy as np
 import torch
 from monai.transforms import Zoom
 from numpy.random import PCG64, Generator
-from tifffile import imread, imwrite
+from skimage.io import imread as imread_skimage
+from skimage.io import imsave as imsave_skimage
+from tifffile import imread, imwrite, memmap
 
 LOGGER = logging.getLogger(__name__)
 ###############
@@ -45,13 +50,10 @@ def save_folder(
     results_folder = results_path / Path(folder_name)
     results_folder.mkdir(exist_ok=exist_ok, parents=True)
 
-    for file, image in zip(image_paths, images):
-        path = results_folder / Path(file).name
-
-        imwrite(
-            path,
-            image,
-        )
+    paths = [results_folder / Path(file).name for file in image_paths]
+    # tifffile releases the GIL when compressing and writing
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(imwrite, paths, images))
     LOGGER.info(f"Saved processed folder as : {results_folder}")
 
 
@@ -69,6 +71,58 @@ def save_layer(results_path, image_name, image):
     imwrite(path, image, dtype="float32")
 
 
+def save_compressed_tif(path, image):
+    """Saves an image as a tiled, zlib-compressed tif file.
+
+    Mostly useful for labels, which contain large uniform regions and compress well.
+
+    Args:
+        path: path of the file to write
+        image: data array containing image
+    """
+    imwrite(path, image, tile=(256, 256), compression="zlib")
+
+
+def save_stack(images, directory, filetype=".tif"):
+    """Saves a 3D image as a folder of 2D slices along the first axis.
+
+    Each slice is written by its own task of a single ``map_blocks`` layer,
+    so slices are written in parallel without building an intermediate copy of the stack.
+
+    Args:
+        images: 3D data array to save
+        directory: path of the folder to write the slices in, created if needed
+        filetype: extension of the slices, e.g. ".tif" or ".png"
+    """
+    directory = Path(directory)
+    directory.mkdir(exist_ok=True, parents=True)
+    stack = da.from_array(images, chunks=(1, *images.shape[1:]))
+    written = da.map_blocks(
+        _write_slice,
+        stack,
+        directory=directory,
+        filetype=filetype,
+        # slice names are sorted alphabetically when loaded back
+        digits=max(4, len(str(len(stack) - 1))),
+        drop_axis=list(range(1, stack.ndim)),
+        chunks=(1,),
+        dtype=bool,
+    )
+    written.compute()
+    LOGGER.info(f"Saved stack in : {directory}")
+
+
+def _write_slice(block, directory, filetype, digits=4, block_info=None):
+    """Writes the slice in ``block`` to ``directory``, named after its index in the stack zero-padded to ``digits``."""
+    index = block_info[0]["chunk-location"][0]
+    path = str(directory / f"{index:0{digits}d}{filetype}")
+    if filetype in {".tif", ".tiff"}:
+        save_compressed_tif(path, block[0])
+    else:
+        imsave_skimage(path, block[0], check_contrast=False)
+    return np.ones(1, dtype=bool)
+
+
 def show_result(
     viewer,
     layer,
@@ -552,10 +606,12 @@ def get_all_matching_files(path, pattern=None):
     return sorted(files)
 
 
-def load_images(dir_or_path, filetype="", as_folder: bool = False):
+def load_images(
+    dir_or_path, filetype="", as_folder: bool = False, lazy: bool = True
+):
     """Loads the images in ``directory``, with different behaviour depending on ``filetype`` and ``as_folder``.
 
-    * If ``as_folder`` is **False**, will load the path as a single 3D **.tif** image.
+    * If ``as_folder`` is **False**, will load the path as a single 3D **.tif** image, memory-mapped when possible if ``lazy`` is **True**.
     * If **True**, it will try to load a folder as stack of images. In this case ``filetype`` must be specified.
 
     If **True** :
@@ -564,20 +620,124 @@ def load_images(dir_or_path, filetype="", as_folder: bool = False):
 
         * For  ``filetype == ".png"`` : loads all png files in the folder as a 3D dataset.
 
+    Folders are loaded lazily as a dask array with one chunk per file, so that only the slices that are accessed are read from disk.
+    If ``lazy`` is **False**, the files are instead read in parallel threads into a numpy array,
+    and single images are read into memory instead of being memory-mapped.
+
+    A **.zarr** store is always opened lazily as a read-only zarr array, regardless of ``as_folder``.
+    Zarr arrays are returned as is, since napari reads the chunks it displays directly from them.
+    If the store is a multiscale group (levels named "0", "1", ...), a list of zarr arrays
+    from highest to lowest resolution is returned, which napari displays as a multiscale image.
 
     Args:
         dir_or_path (str): path to the directory containing the images or the images themselves
-        filetype (str): expected file extension of the image(s) in the directory, if as_folder is False
+        filetype (str): expected file extension of the image(s) in the directory, if as_folder is True
         as_folder (bool): Whether to load a folder of images as stack or a single 3D image
+        lazy (bool): Whether to load a folder as a dask array and memory-map single images (True), or read them into a numpy array (False)
 
     Returns:
-        np.array: array with loaded images
+        np.array: array with loaded images, or list of arrays for a multiscale zarr store
     """
-    # if not as_folder:
+    if Path(dir_or_path).suffix == ".zarr":
+        return _load_zarr(dir_or_path)
+
+    if as_folder:
+        if filetype == "":
+            raise ValueError(
+                "If loading as a folder, filetype must be specified"
+            )
+        filenames = get_all_matching_files(dir_or_path, pattern={filetype})
+        if filenames is None:
+            raise ValueError(f"No {filetype} files found in {dir_or_path}")
+        filenames = [str(f) for f in filenames]
+        if lazy:
+            return _load_stack_lazy(filenames)
+        return _load_stack(filenames)
+
     filename_pattern_original = Path(dir_or_path)
+    if lazy and filename_pattern_original.suffix in {".tif", ".tiff"}:
+        try:
+            # copy-on-write : edits (e.g. of labels) are never written back
+            return memmap(str(filename_pattern_original), mode="c")
+        except ValueError as e:  # e.g. compressed data
+            LOGGER.debug(f"Could not memory-map {dir_or_path} : {e}")
     return imread(str(filename_pattern_original))  # tifffile imread
 
 
+def _load_zarr(path):
+    """Opens a zarr array, or a multiscale zarr group as a list of zarr arrays."""
+    try:
+        import zarr
+    except ImportError as e:
+        msg = "Loading .zarr files requires zarr, please install it using: pip install zarr"
+        LOGGER.error(msg)
+        raise ImportError(msg) from e
+
+    store = zarr.open(str(path), mode="r")
+    if isinstance(store, zarr.Array):
+        return store
+    levels = sorted(
+        (key for key in store.array_keys() if key.isdigit()), key=int
+    )
+    if len(levels) == 0:
+        raise ValueError(f"No multiscale levels found in {path}")
+    return [store[level] for level in levels]
+
+
+def _read_image_file(path):
+    """Reads a single image file, with tifffile for tif files and scikit-image otherwise."""
+    if Path(path).suffix in {".tif", ".tiff"}:
+        return imread(path)
+    return imread_skimage(path)
+
+
+def _read_slice(block, filenames):
+    """Reads the file whose index is contained in ``block``, adding a leading axis for stacking."""
+    return _read_image_file(filenames[block[0]])[np.newaxis]
+
+
+def _load_stack(filenames):
+    """Reads the files in parallel threads and stacks them along the first axis.
+
+    Decoding releases the GIL in tifffile and imagecodecs, so file reads overlap.
+    Tif files are decoded directly into their slice of the stack.
+    """
+    sample = _read_image_file(filenames[0])
+    stack = np.empty((len(filenames), *sample.shape), dtype=sample.dtype)
+    stack[0] = sample
+
+    def read_into_stack(i):
+        path = filenames[i]
+        if Path(path).suffix in {".tif", ".tiff"}:
+            imread(path, out=stack[i])
+        else:
+            stack[i] = imread_skimage(path)
+
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(read_into_stack, range(1, len(filenames))))
+    return stack
+
+
+def _load_stack_lazy(filenames):
+    """Creates a dask array stacking the files along the first axis.
+
+    Uses a single ``map_blocks`` layer over the file indices instead of stacking one array per file,
+    which keeps the task graph small for folders containing many slices.
+    """
+    sample = _read_image_file(filenames[0])
+    stack = da.map_blocks(
+        _read_slice,
+        da.arange(len(filenames), chunks=1),
+        filenames=filenames,
+        new_axis=list(range(1, sample.ndim + 1)),
+        chunks=(1, *sample.shape),
+        dtype=sample.dtype,
+    )
+    # fuses the index and reading tasks, making later slicing cheaper
+    (stack,) = dask.optimize(stack)
+    return stack
+
+
 def quantile_normalization(
     image: Union[np.ndarray, torch.Tensor],
     quantile_high=0.99,